@@ -1,10 +1,153 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
-import altair as alt
 from typing import Any, cast
 
 from scripts.dashboard_data import get_dashboard_data
 
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _load(days: int, top_n: int) -> dict[str, Any]:
+    # Memoized per (days, top_n) so chart-only toggles don't recompute aggregates
+    return cast(dict[str, Any], get_dashboard_data(days=days, top_n=top_n))
+
+
+@st.cache_data(show_spinner=False)
+def _prep_ts(ts: pd.DataFrame, granularity: str) -> pd.DataFrame:
+    """
+    Returns plot-ready DataFrame with columns snapshot_date, total_value_usd
+    (+ week_label / month_label for Weekly / Monthly).
+    """
+    dates = ts["snapshot_date"]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        # Snapshot dates are ISO strings; an explicit format skips per-row inference
+        dates = pd.to_datetime(dates, format="%Y-%m-%d", cache=True)
+
+    # assign() returns a new frame, so the cached input is never mutated and no defensive copy is needed
+    ts = ts.assign(snapshot_date=dates).sort_values("snapshot_date").set_index("snapshot_date")
+    # Plain contiguous float64 block for resample/last
+    ts["total_value_usd"] = np.ascontiguousarray(ts["total_value_usd"].to_numpy(dtype=np.float64))
+
+    if granularity == "Daily":
+        series = ts["total_value_usd"].dropna()
+    elif granularity == "Weekly":
+        # Week close: last snapshot in each week, week ending Monday for consistency
+        series = ts["total_value_usd"].resample("W-MON").last().dropna()
+    else:  # Monthly
+        # Month close: last snapshot in each month
+        series = ts["total_value_usd"].resample("M").last().dropna()
+
+    plot_df = series.reset_index()
+    plot_df.columns = ["snapshot_date", "total_value_usd"]
+
+    # Explicit labels to avoid repeated month ticks
+    if granularity == "Weekly":
+        plot_df["week_label"] = plot_df["snapshot_date"].dt.strftime("%Y-W%U")
+    elif granularity == "Monthly":
+        plot_df["month_label"] = plot_df["snapshot_date"].dt.strftime("%Y-%m")
+
+    return plot_df
+
+
+@st.cache_data(show_spinner=False)
+def _decimate(df: pd.DataFrame, n: int = 1500) -> pd.DataFrame:
+    """
+    Largest-Triangle-Three-Buckets downsample of (snapshot_date, total_value_usd) to n points,
+    so long daily histories don't bog down client-side rendering. Short frames pass through.
+    """
+    size = len(df)
+    if size <= n or n < 3:
+        return df
+
+    x = df["snapshot_date"].to_numpy(dtype="datetime64[ns]").astype(np.int64).astype(np.float64)
+    y = df["total_value_usd"].to_numpy(dtype=np.float64)
+
+    keep = np.empty(n, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = size - 1
+
+    # First/last points are fixed; the rest are split into n-2 buckets
+    every = (size - 2) / (n - 2)
+    a = 0
+    for i in range(n - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, size)
+
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        # Pick the point forming the largest triangle with the previous pick and the next bucket's mean
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(area.argmax())
+        keep[i + 1] = a
+
+    return df.iloc[keep].reset_index(drop=True)
+
+
+# Money/percent columns only need display precision; float32 halves their Arrow payload
+_DISPLAY_FLOAT_COLS = (
+    "usd",
+    "usd_baseline",
+    "delta_usd",
+    "pct_change",
+    "position_value_usd",
+    "value_usd",
+    "total_value_usd",
+)
+
+
+def _narrow_floats(df: pd.DataFrame) -> pd.DataFrame:
+    cols = {c: "float32" for c in _DISPLAY_FLOAT_COLS if c in df.columns}
+    return df.astype(cols) if cols else df
+
+
+@st.cache_data(show_spinner=False)
+def _bd(df: pd.DataFrame, key: str, val: str) -> tuple[pd.Series, pd.DataFrame]:
+    # (bar-chart series, table) for a breakdown, built once per distinct frame
+    table = _narrow_floats(df.reset_index(drop=True))
+    return table.set_index(key)[val], table
+
+
+def _vl_line_spec(
+    field_x: str,
+    type_x: str,
+    x_axis_fmt: str | None,
+    *,
+    x_title: str,
+    tooltip_title: str,
+    interactive: bool = False,
+    height: int = 320,
+) -> dict[str, Any]:
+    """
+    Literal Vega-Lite v5 line spec for the hero chart.
+    Built by hand instead of through Altair, whose spec validation dominates rerun cost.
+    """
+    x_axis: dict[str, Any] = {"labelAngle": 0}
+    if x_axis_fmt:
+        x_axis["format"] = x_axis_fmt
+
+    spec: dict[str, Any] = {
+        "mark": "line",
+        "height": height,
+        "encoding": {
+            "x": {"field": field_x, "type": type_x, "title": x_title, "axis": x_axis},
+            "y": {"field": "total_value_usd", "type": "quantitative", "title": "Total Value (USD)"},
+            "tooltip": [
+                {"field": "snapshot_date", "type": "temporal", "title": tooltip_title},
+                {"field": "total_value_usd", "type": "quantitative", "title": "Value (USD)", "format": ",.2f"},
+            ],
+        },
+    }
+    if interactive:
+        # Same as Altair's .interactive(): pan/zoom bound to the scales
+        spec["params"] = [{"name": "grid", "select": "interval", "bind": "scales"}]
+    return spec
+
+
 st.set_page_config(page_title="MTG Collection Dashboard", layout="wide")
 st.title("🧙‍♂️ Magic: The Gathering Collection Dashboard")
 
@@ -26,7 +169,7 @@ chart_granularity = st.sidebar.selectbox(
 # Load data
 # -------------------------
 with st.spinner("Loading portfolio data..."):
-    data = cast(dict[str, Any], get_dashboard_data(days=days, top_n=top_n))
+    data = _load(days, top_n)
 
 latest_snapshot = cast(str, data["latest_snapshot"])
 baseline_snapshot = cast(str | None, data["baseline_snapshot"])
@@ -62,93 +205,23 @@ st.divider()
 # -------------------------
 st.subheader("📈 Total Portfolio Value Over Time")
 
-ts = portfolio_ts.copy()
-if ts.empty or ts.shape[0] < 2:
+if portfolio_ts.empty or portfolio_ts.shape[0] < 2:
     st.caption("Not enough history yet — add more snapshots to populate this chart.")
 else:
-    ts["snapshot_date"] = pd.to_datetime(ts["snapshot_date"])
-    ts = ts.sort_values("snapshot_date").set_index("snapshot_date")
+    plot_df = _prep_ts(portfolio_ts.reset_index(drop=True), chart_granularity)
 
     if chart_granularity == "Daily":
-        series = ts["total_value_usd"].dropna()
-        plot_df = series.reset_index()
-        plot_df.columns = ["snapshot_date", "total_value_usd"]
-
-        chart = (
-            alt.Chart(plot_df)
-            .mark_line()
-            .encode(
-                x=alt.X(
-                    "snapshot_date:T",
-                    title="Date",
-                    axis=alt.Axis(format="%d %b %Y", labelAngle=0),
-                ),
-                y=alt.Y("total_value_usd:Q", title="Total Value (USD)"),
-                tooltip=[
-                    alt.Tooltip("snapshot_date:T", title="Date"),
-                    alt.Tooltip("total_value_usd:Q", title="Value (USD)", format=",.2f"),
-                ],
-            )
-            .properties(height=320)
-            .interactive()
+        plot_df = _decimate(plot_df)
+        spec = _vl_line_spec(
+            "snapshot_date", "temporal", "%d %b %Y",
+            x_title="Date", tooltip_title="Date", interactive=True,
         )
-        st.altair_chart(chart, use_container_width=True)
-
     elif chart_granularity == "Weekly":
-        # Week close: last snapshot in each week, week ending Monday for consistency
-        weekly = ts["total_value_usd"].resample("W-MON").last().dropna()
-        plot_df = weekly.reset_index()
-        plot_df.columns = ["snapshot_date", "total_value_usd"]
-
-        # Explicit labels to avoid repeated month labels
-        plot_df["week_label"] = plot_df["snapshot_date"].dt.strftime("%Y-W%U")
-
-        chart = (
-            alt.Chart(plot_df)
-            .mark_line()
-            .encode(
-                x=alt.X(
-                    "week_label:N",
-                    title="Week",
-                    axis=alt.Axis(labelAngle=0),
-                ),
-                y=alt.Y("total_value_usd:Q", title="Total Value (USD)"),
-                tooltip=[
-                    alt.Tooltip("snapshot_date:T", title="Week ending"),
-                    alt.Tooltip("total_value_usd:Q", title="Value (USD)", format=",.2f"),
-                ],
-            )
-            .properties(height=320)
-        )
-        st.altair_chart(chart, use_container_width=True)
-
+        spec = _vl_line_spec("week_label", "nominal", None, x_title="Week", tooltip_title="Week ending")
     else:  # Monthly
-        # Month close: last snapshot in each month
-        monthly = ts["total_value_usd"].resample("M").last().dropna()
-        plot_df = monthly.reset_index()
-        plot_df.columns = ["snapshot_date", "total_value_usd"]
+        spec = _vl_line_spec("month_label", "nominal", None, x_title="Month", tooltip_title="Month ending")
 
-        # Explicit labels to avoid repeated month ticks
-        plot_df["month_label"] = plot_df["snapshot_date"].dt.strftime("%Y-%m")
-
-        chart = (
-            alt.Chart(plot_df)
-            .mark_line()
-            .encode(
-                x=alt.X(
-                    "month_label:N",
-                    title="Month",
-                    axis=alt.Axis(labelAngle=0),
-                ),
-                y=alt.Y("total_value_usd:Q", title="Total Value (USD)"),
-                tooltip=[
-                    alt.Tooltip("snapshot_date:T", title="Month ending"),
-                    alt.Tooltip("total_value_usd:Q", title="Value (USD)", format=",.2f"),
-                ],
-            )
-            .properties(height=320)
-        )
-        st.altair_chart(chart, use_container_width=True)
+    st.vega_lite_chart(_narrow_floats(plot_df), spec, use_container_width=True)
 
 
 st.divider()
@@ -167,7 +240,7 @@ holdings_cols = [
     "set_code",
     "collector_number",
 ]
-st.dataframe(top_holdings[holdings_cols], use_container_width=True)
+st.dataframe(_narrow_floats(top_holdings.loc[:, holdings_cols].reset_index(drop=True)), use_container_width=True)
 
 st.divider()
 
@@ -175,6 +248,7 @@ st.divider()
 # Movers
 # -------------------------
 st.subheader(f"📈 Movers (last {days} day(s))")
+movers_cols = ["name", "finish", "usd_baseline", "usd", "delta_usd", "pct_change"]
 g_col, l_col = st.columns(2)
 
 with g_col:
@@ -183,7 +257,7 @@ with g_col:
         st.caption("No positive price movements in this window.")
     else:
         st.dataframe(
-            gainers[["name", "finish", "usd_baseline", "usd", "delta_usd", "pct_change"]],
+            _narrow_floats(gainers.loc[:, movers_cols].reset_index(drop=True)),
             use_container_width=True,
         )
 
@@ -193,7 +267,7 @@ with l_col:
         st.caption("No negative price movements in this window.")
     else:
         st.dataframe(
-            losers[["name", "finish", "usd_baseline", "usd", "delta_usd", "pct_change"]],
+            _narrow_floats(losers.loc[:, movers_cols].reset_index(drop=True)),
             use_container_width=True,
         )
 
@@ -205,14 +279,17 @@ st.divider()
 st.subheader("📊 Portfolio Breakdown")
 b1, b2 = st.columns(2)
 
+rarity_series, rarity_table = _bd(rarity_breakdown, "rarity", "value_usd")
+type_series, type_table = _bd(type_breakdown, "type_bucket", "value_usd")
+
 with b1:
     st.markdown("### By Rarity (Value USD)")
-    st.bar_chart(rarity_breakdown.set_index("rarity")["value_usd"])
-    st.dataframe(rarity_breakdown, use_container_width=True)
+    st.bar_chart(rarity_series)
+    st.dataframe(rarity_table, use_container_width=True)
 
 with b2:
     st.markdown("### By Card Type (Value USD)")
-    st.bar_chart(type_breakdown.set_index("type_bucket")["value_usd"])
-    st.dataframe(type_breakdown, use_container_width=True)
+    st.bar_chart(type_series)
+    st.dataframe(type_table, use_container_width=True)
 
 st.caption("Prices sourced from Scryfall. Dashboard uses daily snapshots for reproducibility.")
@@ -1,16 +1,103 @@
 from __future__ import annotations
 
 import json
+import sqlite3
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import pandas as pd
+import pyarrow as pa
 import requests
+from pyarrow import csv as pa_csv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json behaves the same
+    orjson = None
 
 SCRYFALL_API = "https://api.scryfall.com"
 CACHE_TTL_HOURS = 12
+CARD_CACHE_DB = "cards.sqlite"
+FETCH_WORKERS = 8
+COLLECTION_BATCH = 75  # Scryfall's /cards/collection identifier limit
+
+COLLECTION_DTYPES = {
+    "set": pa.string(),
+    "collector_number": pa.string(),  # "0473" must not be parsed as 473
+    "qty": pa.int32(),
+    "finish": pa.string(),
+}
+
+
+def _json_loads(data: bytes) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _json_dumps(obj: Any) -> bytes:
+    return orjson.dumps(obj) if orjson is not None else json.dumps(obj).encode("utf-8")
+
+
+def ro_connect(db_path: Path) -> sqlite3.Connection:
+    """
+    Read-only connection for the snapshot readers (dashboard, CLIs).
+    Takes no write lock and serves pages via mmap instead of read() copies.
+    Raises sqlite3.OperationalError if the DB file does not exist.
+    """
+    conn = sqlite3.connect(Path(db_path).resolve().as_uri() + "?mode=ro", uri=True)
+    conn.execute("PRAGMA mmap_size=268435456;")  # 256 MiB
+    conn.execute("PRAGMA cache_size=-65536;")  # 64 MiB
+    return conn
+
+
+class RateLimiter:
+    """
+    Context manager allowing at most max_calls entries per period seconds,
+    shared across threads (Scryfall asks for <= 10 requests/second).
+    """
+
+    def __init__(self, max_calls: int, period: float) -> None:
+        self.max_calls = max_calls
+        self.period = period
+        self._calls: deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "RateLimiter":
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= self.period:
+                    self._calls.popleft()
+                if len(self._calls) < self.max_calls:
+                    self._calls.append(now)
+                    return self
+                time.sleep(self.period - (now - self._calls[0]))
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+SCRYFALL_RATE_LIMIT = RateLimiter(max_calls=9, period=1.0)
+
+
+def _make_session() -> requests.Session:
+    # Pooled keep-alive connections + retry on throttling/transient errors
+    session = requests.Session()
+    session.headers.update({"User-Agent": "mtg-portfolio-dashboard/1.0", "Accept": "application/json"})
+    retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+    session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retry))
+    return session
+
+
+SCRYFALL_SESSION = _make_session()
+
 
 @dataclass(frozen=True)
 class PrintingKey:
@@ -22,69 +109,193 @@ def load_collection(csv_path: Path) -> pd.DataFrame:
     if not csv_path.exists():
         raise FileNotFoundError(f"CSV not found: {csv_path}")
 
-    df = pd.read_csv(csv_path)
+    # Arrow parser with the column types pinned at parse time (pandas' dtype= only casts after
+    # inference); strings stay Arrow-backed so .str ops run in C
+    table = pa_csv.read_csv(csv_path, convert_options=pa_csv.ConvertOptions(column_types=COLLECTION_DTYPES))
+    df = table.to_pandas(types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get)
 
     required = ["set", "collector_number", "qty", "finish"]
     missing = [c for c in required if c not in df.columns]
     if missing:
         raise ValueError(f"Missing required columns: {missing}. Found: {list(df.columns)}")
 
-    df["set"] = df["set"].astype(str).str.strip().str.lower()
-    df["collector_number"] = df["collector_number"].astype(str).str.strip()
-    df["finish"] = df["finish"].astype(str).str.strip().str.lower()
-    df["qty"] = pd.to_numeric(df["qty"], errors="raise").astype(int)
+    df["set"] = df["set"].str.strip().str.lower()
+    df["collector_number"] = df["collector_number"].str.strip()
+    df["finish"] = df["finish"].str.strip().str.lower()
 
     if "acquired_price_usd" in df.columns:
         df["acquired_price_usd"] = pd.to_numeric(df["acquired_price_usd"], errors="coerce")
     else:
         df["acquired_price_usd"] = pd.NA
 
-    bad_finish = df[~df["finish"].isin(["nonfoil", "foil"])]
-    if not bad_finish.empty:
-        raise ValueError(
-            f"Invalid finish values: {bad_finish['finish'].unique().tolist()} "
-            f"(allowed: nonfoil, foil)"
-        )
+    # Categorical finish: validate the handful of distinct values, not every row
+    df["finish"] = df["finish"].astype("category")
+    bad = sorted(set(df["finish"].cat.categories) - {"nonfoil", "foil"})
+    if df["finish"].hasnans:
+        bad.append(pd.NA)
+    if bad:
+        raise ValueError(f"Invalid finish values: {bad} (allowed: nonfoil, foil)")
 
     return df
 
-def fetch_scryfall_card(set_code: str, collector_number: str) -> Dict[str, Any]:
+def fetch_scryfall_card(
+    set_code: str, collector_number: str, etag: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    GET a single printing. With etag, sends If-None-Match and returns None on 304 Not Modified.
+    """
     url = f"{SCRYFALL_API}/cards/{set_code}/{collector_number}"
-    r = requests.get(url, timeout=20)
+    headers = {"If-None-Match": etag} if etag else None
+    with SCRYFALL_RATE_LIMIT:
+        r = SCRYFALL_SESSION.get(url, headers=headers, timeout=20)
+    if etag and r.status_code == 304:
+        return None
     r.raise_for_status()
-    return r.json()
+    card = r.json()
+    card["_etag"] = r.headers.get("ETag")
+    return card
 
-def _cache_filename(key: PrintingKey) -> str:
-    safe_cn = key.collector_number.replace("/", "_").replace("\\", "_").replace(" ", "")
-    return f"{key.set_code}__{safe_cn}.json"
 
+def fetch_scryfall_cards_bulk(keys: List[PrintingKey]) -> Dict[PrintingKey, Dict[str, Any]]:
+    """
+    POST /cards/collection with up to COLLECTION_BATCH set+collector_number identifiers per request.
+    Returns {key: card} for the printings Scryfall found; not_found keys are simply absent.
+    """
+    found: Dict[PrintingKey, Dict[str, Any]] = {}
+    for i in range(0, len(keys), COLLECTION_BATCH):
+        chunk = keys[i : i + COLLECTION_BATCH]
+        by_ident = {(k.set_code.lower(), k.collector_number): k for k in chunk}
+        with SCRYFALL_RATE_LIMIT:
+            r = SCRYFALL_SESSION.post(
+                f"{SCRYFALL_API}/cards/collection",
+                json={
+                    "identifiers": [
+                        {"set": k.set_code, "collector_number": k.collector_number} for k in chunk
+                    ]
+                },
+                timeout=30,
+            )
+        r.raise_for_status()
 
-def cache_get(cache_dir: Path, key: PrintingKey, ttl_hours: int) -> Optional[Dict[str, Any]]:
-    path = cache_dir / _cache_filename(key)
-    if not path.exists():
-        return None
+        for card in (r.json() or {}).get("data", []):
+            ident = (str(card.get("set") or "").lower(), str(card.get("collector_number") or ""))
+            key = by_ident.get(ident)
+            if key is not None:
+                found[key] = card
+    return found
+
+
+class CardCache:
+    """
+    Scryfall card payloads in one SQLite file (cache_dir/cards.sqlite),
+    one row per printing, instead of one JSON file per card.
+    """
 
+    def __init__(self, db_path: Path) -> None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL;")
+        self._conn.execute("PRAGMA synchronous=NORMAL;")
+        self._conn.execute("""
+        CREATE TABLE IF NOT EXISTS cards (
+            set_code TEXT NOT NULL,
+            collector_number TEXT NOT NULL,
+            fetched_at REAL NOT NULL,
+            payload BLOB NOT NULL,
+            PRIMARY KEY (set_code, collector_number)
+        );
+        """)
+        self._conn.commit()
+
+    def fetched_at(self, key: PrintingKey) -> Optional[float]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at FROM cards WHERE set_code = ? AND collector_number = ?;",
+                (key.set_code, key.collector_number),
+            ).fetchone()
+        return float(row[0]) if row else None
+
+    def payload(self, key: PrintingKey) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM cards WHERE set_code = ? AND collector_number = ?;",
+                (key.set_code, key.collector_number),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: PrintingKey, fetched_at: float, payload: bytes) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cards VALUES (?, ?, ?, ?);",
+                (key.set_code, key.collector_number, fetched_at, payload),
+            )
+            self._conn.commit()
+
+    def touch(self, key: PrintingKey, fetched_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE cards SET fetched_at = ? WHERE set_code = ? AND collector_number = ?;",
+                (fetched_at, key.set_code, key.collector_number),
+            )
+            self._conn.commit()
+
+
+_CARD_CACHES: Dict[Path, CardCache] = {}
+_CARD_CACHES_LOCK = threading.Lock()
+
+
+def _card_cache(cache_dir: Path) -> CardCache:
+    # One open store per cache_dir for the lifetime of the process
+    with _CARD_CACHES_LOCK:
+        store = _CARD_CACHES.get(cache_dir)
+        if store is None:
+            store = CardCache(cache_dir / CARD_CACHE_DB)
+            _CARD_CACHES[cache_dir] = store
+        return store
+
+
+@lru_cache(maxsize=4096)
+def _decoded_payload(cache_dir: Path, key: PrintingKey, fetched_at: float) -> Optional[Dict[str, Any]]:
+    # Keyed on fetched_at so a rewrite/touch of the row invalidates the parsed copy
+    payload = _card_cache(cache_dir).payload(key)
+    if payload is None:
+        return None
     try:
-        data = json.loads(path.read_text(encoding="utf-8"))
+        return _json_loads(payload)
     except Exception:
         return None
 
-    fetched_at = data.get("_fetched_at_epoch")
-    if not isinstance(fetched_at, (int, float)):
+
+def _cache_read(cache_dir: Path, key: PrintingKey, ttl_hours: Optional[int]) -> Optional[Dict[str, Any]]:
+    # ttl_hours=None returns the entry regardless of age (for conditional revalidation)
+    fetched_at = _card_cache(cache_dir).fetched_at(key)
+    if fetched_at is None:
         return None
 
-    age_seconds = time.time() - float(fetched_at)
-    if age_seconds > ttl_hours * 3600:
+    if ttl_hours is not None:
+        age_seconds = time.time() - fetched_at
+        if age_seconds > ttl_hours * 3600:
+            return None
+
+    cached = _decoded_payload(cache_dir, key, fetched_at)
+    if cached is None:
         return None
 
+    # shallow copy: callers stamp their own top-level fields on the result
+    data = dict(cached)
+    data["_fetched_at_epoch"] = fetched_at
     return data
 
 
+def cache_get(cache_dir: Path, key: PrintingKey, ttl_hours: int) -> Optional[Dict[str, Any]]:
+    return _cache_read(cache_dir, key, ttl_hours=ttl_hours)
+
+
 def cache_set(cache_dir: Path, key: PrintingKey, card: Dict[str, Any]) -> None:
-    cache_dir.mkdir(parents=True, exist_ok=True)
     card = dict(card)
     card["_fetched_at_epoch"] = time.time()
-    (cache_dir / _cache_filename(key)).write_text(json.dumps(card), encoding="utf-8")
+    _card_cache(cache_dir).set(key, card["_fetched_at_epoch"], _json_dumps(card))
 
 
 def fetch_scryfall_card_cached(cache_dir: Path, key: PrintingKey, ttl_hours: int) -> Tuple[Dict[str, Any], str]:
@@ -92,11 +303,69 @@ def fetch_scryfall_card_cached(cache_dir: Path, key: PrintingKey, ttl_hours: int
     if cached is not None:
         return cached, "cache_hit"
 
-    card = fetch_scryfall_card(key.set_code, key.collector_number)
+    # Expired: revalidate with the stored ETag, if any (only single-GET payloads carry one)
+    stale = _cache_read(cache_dir, key, ttl_hours=None)
+    etag = stale.get("_etag") if stale else None
+
+    card = fetch_scryfall_card(key.set_code, key.collector_number, etag=etag)
+    if card is None and stale is not None:
+        stale["_fetched_at_epoch"] = time.time()
+        _card_cache(cache_dir).touch(key, stale["_fetched_at_epoch"])
+        return stale, "cache_revalidated"
+
     cache_set(cache_dir, key, card)
     return card, "cache_miss_fetched"
 
 
+def fetch_all(
+    cache_dir: Path, keys: Iterable[PrintingKey], ttl_hours: int = CACHE_TTL_HOURS
+) -> Dict[PrintingKey, Tuple[Dict[str, Any], str]]:
+    """
+    fetch_scryfall_card_cached for many printings at once.
+    Cache misses and expired entries are refetched in /cards/collection batches;
+    anything the batch endpoint doesn't return falls back to single GETs on a
+    thread pool, with SCRYFALL_RATE_LIMIT keeping the pool under Scryfall's
+    request rate.
+    Batch responses carry no per-card ETag, so ETag revalidation (304 ->
+    "cache_revalidated") only applies to printings last fetched by a single GET,
+    i.e. the few the batch endpoint doesn't resolve; every other expired entry
+    is simply refetched in bulk.
+    """
+    unique_keys = list(dict.fromkeys(keys))
+    results: Dict[PrintingKey, Tuple[Dict[str, Any], str]] = {}
+
+    misses: List[PrintingKey] = []
+    revalidate: List[PrintingKey] = []
+    for key in unique_keys:
+        cached = cache_get(cache_dir, key, ttl_hours=ttl_hours)
+        if cached is not None:
+            results[key] = (cached, "cache_hit")
+            continue
+        # Only single-GET payloads have an _etag; bulk-fetched ones are refetched in bulk
+        stale = _cache_read(cache_dir, key, ttl_hours=None)
+        if stale is not None and stale.get("_etag"):
+            revalidate.append(key)
+        else:
+            misses.append(key)
+
+    # Absent keys go out in /cards/collection batches; single GETs only for what that didn't return
+    if misses:
+        for key, card in fetch_scryfall_cards_bulk(misses).items():
+            cache_set(cache_dir, key, card)
+            results[key] = (card, "cache_miss_fetched")
+
+    leftover = revalidate + [key for key in misses if key not in results]
+    if leftover:
+
+        def fetch(key: PrintingKey) -> Tuple[Dict[str, Any], str]:
+            return fetch_scryfall_card_cached(cache_dir, key, ttl_hours=ttl_hours)
+
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as ex:
+            results.update(zip(leftover, ex.map(fetch, leftover)))
+
+    return {key: results[key] for key in unique_keys}
+
+
 def choose_unit_price_usd(card: Dict[str, Any], finish: str) -> Tuple[Optional[float], str]:
     prices = card.get("prices") or {}
 
@@ -1,13 +1,18 @@
 from __future__ import annotations
 
 import csv
+import io
+import os
+import re
 import sys
 from pathlib import Path
 
-import requests
+from _shared import SCRYFALL_SESSION
 
 SCRYFALL_SEARCH = "https://api.scryfall.com/cards/search"
 
+_INT = re.compile(r"[0-9]+").fullmatch
+
 
 def search_printings(query: str, limit: int = 10) -> list[dict]:
     params = {
@@ -16,7 +21,7 @@ def search_printings(query: str, limit: int = 10) -> list[dict]:
         "order": "released",
         "dir": "desc",
     }
-    r = requests.get(SCRYFALL_SEARCH, params=params, timeout=20)
+    r = SCRYFALL_SESSION.get(SCRYFALL_SEARCH, params=params, timeout=20)
     r.raise_for_status()
     return r.json().get("data", [])[:limit]
 
@@ -64,7 +69,7 @@ def main():
         )
 
     choice = int(prompt("Select printing [1-{n}] (0 to cancel): ".format(n=len(cards)),
-                         lambda x: x.isdigit() and 0 <= int(x) <= len(cards)))
+                         lambda x: bool(_INT(x)) and 0 <= int(x) <= len(cards)))
     if choice == 0:
         print("Cancelled.")
         return
@@ -76,7 +81,7 @@ def main():
         lambda x: x in card["finishes"]
     )
 
-    qty = int(prompt("Quantity: ", lambda x: x.isdigit() and int(x) > 0))
+    qty = int(prompt("Quantity: ", lambda x: bool(_INT(x)) and int(x) > 0))
 
     row = {
         "set": card["set"],
@@ -97,25 +102,20 @@ def main():
         print("Aborted.")
         return
 
-    # Ensure file ends with a newline before appending
-    needs_newline = False
-    if csv_path.exists():
-        with open(csv_path, "rb") as f:
-            if f.tell() == 0:
-                needs_newline = False
-            else:
-                f.seek(-1, 2)
-                needs_newline = f.read(1) != b"\n"
-
-    with open(csv_path, "a", newline="", encoding="utf-8") as f:
-        if needs_newline:
-            f.write("\n")
-
-        writer = csv.DictWriter(
-            f,
-            fieldnames=["set", "collector_number", "qty", "finish", "acquired_price_usd"],
-        )
-        writer.writerow(row)
+    # Single open: peek at the last byte, then append through a text wrapper
+    with open(csv_path, "a+b") as raw:
+        raw.seek(0, os.SEEK_END)
+        if raw.tell() > 0:
+            raw.seek(-1, os.SEEK_END)
+            if raw.read(1) != b"\n":
+                raw.write(b"\n")
+
+        with io.TextIOWrapper(raw, encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(
+                f,
+                fieldnames=["set", "collector_number", "qty", "finish", "acquired_price_usd"],
+            )
+            writer.writerow(row)
 
 
 if __name__ == "__main__":
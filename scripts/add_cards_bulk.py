@@ -1,15 +1,17 @@
 from __future__ import annotations
 
-import time
+import csv
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
 
-import requests
+from _shared import SCRYFALL_RATE_LIMIT, SCRYFALL_SESSION
 
 SCRYFALL = "https://api.scryfall.com"
 PRICE_CAP_USD = 50.0
 FINISH = "nonfoil"
-SLEEP_S = 0.08  # be polite
+MAX_WORKERS = 8  # lookups in flight; SCRYFALL_RATE_LIMIT keeps us polite
+COLLECTION_BATCH = 75  # max identifiers per /cards/collection request
 
 
 def _to_float(x: Any) -> float | None:
@@ -24,15 +26,61 @@ def _to_float(x: Any) -> float | None:
 def _search_prints(name: str) -> List[Dict[str, Any]]:
     # exact name search, paper only, printings
     q = f'!"{name}" game:paper'
-    r = requests.get(
-        f"{SCRYFALL}/cards/search",
-        params={"q": q, "unique": "prints", "order": "usd", "dir": "asc"},
-        timeout=20,
-    )
+    with SCRYFALL_RATE_LIMIT:
+        r = SCRYFALL_SESSION.get(
+            f"{SCRYFALL}/cards/search",
+            params={"q": q, "unique": "prints", "order": "usd", "dir": "asc"},
+            timeout=20,
+        )
     r.raise_for_status()
     return (r.json() or {}).get("data", [])
 
 
+def _fetch_collection(names: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Resolve names in batches via POST /cards/collection (one default printing per name).
+    Returns {name: card} for the names Scryfall found; the rest are simply absent.
+    """
+    found: Dict[str, Dict[str, Any]] = {}
+    for i in range(0, len(names), COLLECTION_BATCH):
+        chunk = names[i : i + COLLECTION_BATCH]
+        with SCRYFALL_RATE_LIMIT:
+            r = SCRYFALL_SESSION.post(
+                f"{SCRYFALL}/cards/collection",
+                json={"identifiers": [{"name": n} for n in chunk]},
+                timeout=30,
+            )
+        r.raise_for_status()
+
+        # Match by name, not position: split cards are indexed by full name and by each face
+        by_name: Dict[str, Dict[str, Any]] = {}
+        for card in (r.json() or {}).get("data", []):
+            full = str(card.get("name") or "")
+            for alias in [full, *full.split(" // ")]:
+                by_name.setdefault(alias.strip().lower(), card)
+        for n in chunk:
+            card = by_name.get(n.strip().lower())
+            if card is not None:
+                found[n] = card
+    return found
+
+
+def _eligible_printing(card: Dict[str, Any], cap: float) -> Tuple[str, str] | None:
+    finishes = card.get("finishes") or []
+    if FINISH not in finishes:
+        return None
+
+    usd = _to_float((card.get("prices") or {}).get("usd"))
+    if usd is None or usd > cap:
+        return None
+
+    set_code = (card.get("set") or "").lower()
+    cn = str(card.get("collector_number") or "").strip()
+    if set_code and cn:
+        return set_code, cn
+    return None
+
+
 def pick_printing(name: str, cap: float = PRICE_CAP_USD) -> Tuple[str, str]:
     """
     Pick a reasonable 'normal' printing:
@@ -42,20 +90,9 @@ def pick_printing(name: str, cap: float = PRICE_CAP_USD) -> Tuple[str, str]:
     """
     prints = _search_prints(name)
     for card in prints:
-        finishes = card.get("finishes") or []
-        if FINISH not in finishes:
-            continue
-
-        usd = _to_float((card.get("prices") or {}).get("usd"))
-        if usd is None:
-            continue
-        if usd > cap:
-            continue
-
-        set_code = (card.get("set") or "").lower()
-        cn = str(card.get("collector_number") or "").strip()
-        if set_code and cn:
-            return set_code, cn
+        picked = _eligible_printing(card, cap)
+        if picked is not None:
+            return picked
 
     raise RuntimeError(f"No nonfoil USD printing <= ${cap:.2f} found for: {name}")
 
@@ -159,28 +196,44 @@ def main() -> None:
         (1, "Vault of the Archangel"),
     ]
 
-    lines = []
+    rows: List[Tuple[str, str, int, str, str]] = []
     failures = []
 
-    for qty, name in cards:
-        try:
-            set_code, cn = pick_printing(name, cap=PRICE_CAP_USD)
-            lines.append(f"{set_code},{cn},{qty},{FINISH},")
-            print(f"OK  x{qty:<2d} {name} -> {set_code} {cn}")
-        except Exception as e:
-            failures.append(f"{name}: {e}")
-            print(f"FAIL {name}: {e}")
-        time.sleep(SLEEP_S)
+    # One batched round-trip per 75 names; per-name search only for the leftovers
+    try:
+        batch_hits = _fetch_collection([name for _, name in cards])
+    except Exception as e:
+        print(f"Batch lookup failed, falling back to per-card search: {e}")
+        batch_hits = {}
+
+    def resolve(name: str) -> Tuple[str, str]:
+        card = batch_hits.get(name)
+        if card is not None:
+            picked = _eligible_printing(card, PRICE_CAP_USD)
+            if picked is not None:
+                return picked
+        return pick_printing(name, cap=PRICE_CAP_USD)
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        futures = [ex.submit(resolve, name) for _, name in cards]
+
+        # Collect in submission order so the CSV matches the decklist order
+        for (qty, name), fut in zip(cards, futures):
+            try:
+                set_code, cn = fut.result()
+                rows.append((set_code, cn, qty, FINISH, ""))
+                print(f"OK  x{qty:<2d} {name} -> {set_code} {cn}")
+            except Exception as e:
+                failures.append(f"{name}: {e}")
+                print(f"FAIL {name}: {e}")
 
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    out_path.write_text(
-        "set,collector_number,qty,finish,acquired_price_usd\n"
-        + "\n".join(lines)
-        + "\n",
-        encoding="utf-8",
-    )
-
-    print(f"\n✅ Wrote {len(lines)} rows to {out_path}")
+    with out_path.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f, lineterminator="\n")
+        w.writerow(["set", "collector_number", "qty", "finish", "acquired_price_usd"])
+        w.writerows(rows)
+
+    print(f"\n✅ Wrote {len(rows)} rows to {out_path}")
     if failures:
         print("\n⚠️ Failures (usually name formatting / no USD):")
         for f in failures:
@@ -3,17 +3,18 @@ from __future__ import annotations
 import sqlite3
 import time
 from datetime import date, timedelta
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
 
+import numpy as np
 import pandas as pd
 
 from scripts._shared import (
     CACHE_TTL_HOURS,
     PrintingKey,
-    choose_unit_price_usd,
-    fetch_scryfall_card_cached,
+    fetch_all,
     load_collection,
+    ro_connect,
 )
 
 # -------------------------
@@ -34,6 +35,26 @@ def _snapshot_on_or_before(conn: sqlite3.Connection, target_date: str) -> str |
     return row[0] if row and row[0] else None
 
 
+# -------------------------
+# Holdings (collection.csv)
+# -------------------------
+@lru_cache(maxsize=4)
+def _load_owned(csv_path: str, mtime_ns: int) -> pd.DataFrame:
+    """
+    Normalized holdings: columns = set_code, collector_number, finish, qty
+    Keyed on the file's mtime so edits to collection.csv invalidate the cache.
+    Shared between callers -- treat the returned frame as read-only.
+    """
+    df = load_collection(Path(csv_path))
+
+    owned = df[["set", "collector_number", "finish", "qty"]].copy()
+    owned.rename(columns={"set": "set_code"}, inplace=True)
+    owned["set_code"] = owned["set_code"].astype(str).str.strip().str.lower()
+    owned["collector_number"] = owned["collector_number"].astype(str).str.strip()
+    owned["finish"] = owned["finish"].astype(str).str.strip().str.lower()
+    return owned
+
+
 # -------------------------
 # Live pricing (no persistence)
 # -------------------------
@@ -50,38 +71,52 @@ def _compute_live_owned(
     """
     # fetch once per unique printing
     unique = owned[["set_code", "collector_number"]].drop_duplicates()
-    card_cache: dict[PrintingKey, dict[str, Any]] = {}
-
-    for _, r in unique.iterrows():
-        key = PrintingKey(str(r["set_code"]), str(r["collector_number"]))
-        card, _note = fetch_scryfall_card_cached(cache_dir, key, ttl_hours=ttl_hours)
-        card_cache[key] = card
-
-    names: list[str] = []
-    scry_ids: list[str] = []
-    rarities: list[str] = []
-    type_lines: list[str] = []
-    usd_prices: list[float | None] = []
-
-    for _, r in owned.iterrows():
-        key = PrintingKey(str(r["set_code"]), str(r["collector_number"]))
-        card = card_cache[key]
-
-        unit, _price_note = choose_unit_price_usd(card, str(r["finish"]))
-        usd_prices.append(unit)
-
-        names.append(str(card.get("name") or ""))
-        scry_ids.append(str(card.get("id") or ""))
-        rarities.append(str((card.get("rarity") or "unknown")).lower())
-        type_lines.append(str(card.get("type_line") or ""))
-
-    out = owned.copy()
-    out["name"] = names
-    out["scryfall_id"] = scry_ids
-    out["rarity"] = rarities
-    out["type_line"] = type_lines
-    out["usd"] = usd_prices
-    out["position_value_usd"] = out["usd"] * out["qty"]
+    keys = [
+        PrintingKey(str(set_code), str(cn))
+        for set_code, cn in unique.itertuples(index=False, name=None)
+    ]
+
+    fetched = fetch_all(cache_dir, keys, ttl_hours=ttl_hours)
+    card_cache = {key: card for key, (card, _note) in fetched.items()}
+
+    # one metadata row per printing, attached to holdings with a single merge
+    cards_df = pd.DataFrame.from_records(
+        [
+            {
+                "set_code": k.set_code,
+                "collector_number": k.collector_number,
+                "name": str(c.get("name") or ""),
+                "scryfall_id": str(c.get("id") or ""),
+                "rarity": str(c.get("rarity") or "unknown").lower(),
+                "type_line": str(c.get("type_line") or ""),
+                "usd_nonfoil": (c.get("prices") or {}).get("usd"),
+                "usd_foil": (c.get("prices") or {}).get("usd_foil"),
+            }
+            for k, c in card_cache.items()
+        ],
+        columns=[
+            "set_code", "collector_number", "name", "scryfall_id",
+            "rarity", "type_line", "usd_nonfoil", "usd_foil",
+        ],
+    )
+
+    # resolve the price for each finish once per printing, not once per holding
+    # (same rule as choose_unit_price_usd: preferred finish, else the other one)
+    usd_nonfoil = pd.to_numeric(cards_df.pop("usd_nonfoil"), errors="coerce").astype(np.float64)
+    usd_foil = pd.to_numeric(cards_df.pop("usd_foil"), errors="coerce").astype(np.float64)
+    cards_df["usd_if_foil"] = usd_foil.fillna(usd_nonfoil)
+    cards_df["usd_if_nonfoil"] = usd_nonfoil.fillna(usd_foil)
+
+    out = owned.merge(cards_df, on=["set_code", "collector_number"], how="left", validate="m:1")
+    out.index = owned.index
+
+    out["usd"] = np.where(
+        out["finish"].eq("foil").to_numpy(),
+        out.pop("usd_if_foil").to_numpy(),
+        out.pop("usd_if_nonfoil").to_numpy(),
+    )
+
+    out["position_value_usd"] = out["usd"].to_numpy() * out["qty"].to_numpy()
     return out
 
 
@@ -102,29 +137,25 @@ def get_dashboard_data(days: int = 7, top_n: int = 5, live_prices: bool = True)
     db_path = root / "data" / "mtg_prices.sqlite"
     cache_dir = root / "data" / "cache" / "scryfall"
 
-    df = load_collection(csv_path)
-
-    # Normalize keys
-    owned = df[["set", "collector_number", "finish", "qty"]].copy()
-    owned.rename(columns={"set": "set_code"}, inplace=True)
-    owned["set_code"] = owned["set_code"].astype(str).str.strip().str.lower()
-    owned["collector_number"] = owned["collector_number"].astype(str).str.strip()
-    owned["finish"] = owned["finish"].astype(str).str.strip().str.lower()
+    owned = _load_owned(str(csv_path), csv_path.stat().st_mtime_ns)
 
     # Defaults if DB not available / empty
     latest: str | None = None
     baseline: str | None = None
     baseline_rows = pd.DataFrame()
+    movers: pd.DataFrame | None = None
 
     # Try to open DB (needed for baseline + history)
     conn: sqlite3.Connection | None = None
     try:
-        conn = sqlite3.connect(db_path)
+        conn = ro_connect(db_path)
         latest = _latest_snapshot_date(conn)
         target = (date.fromisoformat(latest) - timedelta(days=days)).isoformat()
         baseline = _snapshot_on_or_before(conn, target)
 
-        if baseline is not None:
+        # Snapshot mode joins against the baseline in SQL instead (see below)
+        if baseline is not None and live_prices:
+            # strings land in Arrow buffers; prices stay float64 for the NumPy math below
             baseline_rows = pd.read_sql_query(
                 """
                 SELECT scryfall_id, finish, usd AS usd_baseline
@@ -133,6 +164,8 @@ def get_dashboard_data(days: int = 7, top_n: int = 5, live_prices: bool = True)
                 """,
                 conn,
                 params=(baseline,),
+                dtype={"usd_baseline": "float64"},
+                dtype_backend="pyarrow",
             )
     except Exception:
         # No DB / no snapshots. Dashboard can still show live holdings; no history/movers.
@@ -157,7 +190,7 @@ def get_dashboard_data(days: int = 7, top_n: int = 5, live_prices: bool = True)
                 "No snapshots found for snapshot-mode. Either run scripts/snapshot_prices.py or set live_prices=True."
             )
 
-        conn2 = sqlite3.connect(db_path)
+        conn2 = ro_connect(db_path)
         try:
             latest_rows = pd.read_sql_query(
                 """
@@ -167,7 +200,37 @@ def get_dashboard_data(days: int = 7, top_n: int = 5, live_prices: bool = True)
                 """,
                 conn2,
                 params=(latest,),
+                dtype={"usd": "float64"},
+                dtype_backend="pyarrow",
             )
+
+            if baseline is not None:
+                # latest x baseline join on (scryfall_id, finish), done by SQLite on the snapshot indexes
+                movers_rows = pd.read_sql_query(
+                    """
+                    SELECT l.set_code, l.collector_number, l.finish, l.scryfall_id,
+                           l.name, l.rarity, l.type_line, l.usd, b.usd AS usd_baseline
+                    FROM price_snapshots l
+                    JOIN price_snapshots b
+                      ON b.snapshot_date = ? AND b.scryfall_id = l.scryfall_id AND b.finish = l.finish
+                    WHERE l.snapshot_date = ? AND l.usd IS NOT NULL AND b.usd IS NOT NULL;
+                    """,
+                    conn2,
+                    params=(baseline, latest),
+                    dtype={"usd": "float64", "usd_baseline": "float64"},
+                    dtype_backend="pyarrow",
+                )
+                # one row per printing/finish so duplicate CSV lines don't repeat a mover
+                owned_qty = owned.groupby(
+                    ["set_code", "collector_number", "finish"], as_index=False, sort=False
+                )["qty"].sum()
+                movers = owned_qty.merge(
+                    movers_rows,
+                    on=["set_code", "collector_number", "finish"],
+                    how="inner",
+                    validate="1:1",
+                )
+                movers["position_value_usd"] = movers["usd"] * movers["qty"]
         finally:
             conn2.close()
 
@@ -181,19 +244,21 @@ def get_dashboard_data(days: int = 7, top_n: int = 5, live_prices: bool = True)
     # -------------------------
     top_holdings = (
         latest_owned.dropna(subset=["usd"])
-        .sort_values("position_value_usd", ascending=False)
-        .head(top_n)
+        .nlargest(top_n, "position_value_usd")
         .reset_index(drop=True)
     )
 
-    total_value = float(latest_owned["position_value_usd"].sum(skipna=True))
-    num_positions = int(latest_owned.shape[0])
+    vals = latest_owned["position_value_usd"].to_numpy(dtype=np.float64, copy=False)
+    total_value = float(np.nansum(vals))
+    num_positions = int(vals.size)
 
     # -------------------------
     # Rarity breakdown
     # -------------------------
+    # low-cardinality keys: group on category codes instead of hashing strings
+    latest_owned["rarity"] = latest_owned["rarity"].astype("category")
     rarity_breakdown = (
-        latest_owned.groupby("rarity", dropna=False)
+        latest_owned.groupby("rarity", dropna=False, observed=True)
         .agg(count=("qty", "sum"), value_usd=("position_value_usd", "sum"))
         .sort_values("value_usd", ascending=False)
         .reset_index()
@@ -202,19 +267,20 @@ def get_dashboard_data(days: int = 7, top_n: int = 5, live_prices: bool = True)
     # -------------------------
     # Type buckets breakdown
     # -------------------------
-    def type_buckets(type_line: str) -> list[str]:
-        if not type_line:
-            return ["Unknown"]
-        left = type_line.split("—")[0].strip()
-        parts = [p.strip() for p in left.split() if p.strip()]
-        return parts if parts else ["Unknown"]
-
-    exploded = latest_owned.copy()
-    exploded["type_bucket"] = exploded["type_line"].fillna("").map(type_buckets)
-    exploded = exploded.explode("type_bucket")
+    # "Legendary Creature — Elf" -> ["Legendary", "Creature"]; blank -> ["Unknown"]
+    tl = latest_owned["type_line"].fillna("").astype(str)
+    left = tl.str.split("—", n=1).str[0].str.strip()
+    buckets = left.mask(left.eq(""), "Unknown").str.split()
+    # only the aggregated columns ride along through the explode
+    exploded = (
+        latest_owned[["qty", "position_value_usd"]]
+        .assign(type_bucket=buckets)
+        .explode("type_bucket")
+    )
+    exploded["type_bucket"] = exploded["type_bucket"].astype("category")
 
     type_breakdown = (
-        exploded.groupby("type_bucket", dropna=False)
+        exploded.groupby("type_bucket", dropna=False, observed=True, sort=False)
         .agg(count=("qty", "sum"), value_usd=("position_value_usd", "sum"))
         .sort_values("value_usd", ascending=False)
         .reset_index()
@@ -226,20 +292,38 @@ def get_dashboard_data(days: int = 7, top_n: int = 5, live_prices: bool = True)
     gainers = pd.DataFrame()
     losers = pd.DataFrame()
 
-    if baseline is not None and not baseline_rows.empty:
-        movers = latest_owned.merge(baseline_rows, on=["scryfall_id", "finish"], how="inner")
-        movers = movers.dropna(subset=["usd", "usd_baseline"]).copy()
+    # (snapshot mode already joined latest x baseline in SQL above)
+    if live_prices and baseline is not None and not baseline_rows.empty:
+        # collapse duplicate holdings first so the baseline join is 1:1
+        owned_movers = latest_owned.groupby(
+            ["scryfall_id", "finish"], as_index=False, sort=False, observed=True
+        ).agg(
+            set_code=("set_code", "first"),
+            collector_number=("collector_number", "first"),
+            name=("name", "first"),
+            rarity=("rarity", "first"),
+            type_line=("type_line", "first"),
+            usd=("usd", "first"),
+            qty=("qty", "sum"),
+            position_value_usd=("position_value_usd", "sum"),
+        )
+        movers = owned_movers.merge(
+            baseline_rows, on=["scryfall_id", "finish"], how="inner", validate="1:1"
+        )
+        movers = movers.dropna(subset=["usd", "usd_baseline"])
 
+    if movers is not None and not movers.empty:
         # avoid div-by-zero for pct change
         movers["delta_usd"] = movers["usd"] - movers["usd_baseline"]
-        movers["pct_change"] = movers.apply(
-            lambda r: (r["delta_usd"] / r["usd_baseline"]) * 100.0 if r["usd_baseline"] not in (0, None) else None,
-            axis=1,
+        base = movers["usd_baseline"].to_numpy(dtype=np.float64)
+        delta = movers["delta_usd"].to_numpy(dtype=np.float64)
+        movers["pct_change"] = np.divide(
+            delta * 100.0, base, out=np.full_like(delta, np.nan), where=base != 0
         )
 
         moved = movers[movers["delta_usd"] != 0].copy()
-        gainers = moved[moved["delta_usd"] > 0].sort_values("delta_usd", ascending=False).head(top_n)
-        losers = moved[moved["delta_usd"] < 0].sort_values("delta_usd", ascending=True).head(top_n)
+        gainers = moved[moved["delta_usd"] > 0].nlargest(top_n, "delta_usd")
+        losers = moved[moved["delta_usd"] < 0].nsmallest(top_n, "delta_usd")
 
     return {
         "pricing_mode": pricing_mode,
@@ -268,40 +352,46 @@ def get_portfolio_timeseries() -> pd.DataFrame:
     csv_path = root / "data" / "collection.csv"
     db_path = root / "data" / "mtg_prices.sqlite"
 
-    df = load_collection(csv_path)
+    owned = _load_owned(str(csv_path), csv_path.stat().st_mtime_ns)
 
-    owned = df[["set", "collector_number", "finish", "qty"]].copy()
-    owned.rename(columns={"set": "set_code"}, inplace=True)
-    owned["set_code"] = owned["set_code"].astype(str).str.strip().str.lower()
-    owned["collector_number"] = owned["collector_number"].astype(str).str.strip()
-    owned["finish"] = owned["finish"].astype(str).str.strip().str.lower()
+    # Sum duplicate CSV lines so each printing/finish is a single key row.
+    owned_qty = owned.groupby(
+        ["set_code", "collector_number", "finish"], as_index=False, sort=False
+    )["qty"].sum()
 
-    conn = sqlite3.connect(db_path)
+    conn = ro_connect(db_path)
     try:
-        snaps = pd.read_sql_query(
+        conn.execute(
+            """
+            CREATE TEMP TABLE owned_keys (
+              set_code TEXT NOT NULL,
+              collector_number TEXT NOT NULL,
+              finish TEXT NOT NULL,
+              qty INTEGER NOT NULL,
+              PRIMARY KEY (set_code, collector_number, finish)
+            );
+            """
+        )
+        conn.executemany(
+            "INSERT INTO owned_keys VALUES (?, ?, ?, ?);",
+            owned_qty.to_numpy(dtype=object).tolist(),
+        )
+        ts = pd.read_sql_query(
             """
-            SELECT snapshot_date, set_code, collector_number, finish, usd
-            FROM price_snapshots
-            WHERE usd IS NOT NULL;
+            SELECT p.snapshot_date, SUM(p.usd * o.qty) AS total_value_usd
+            FROM price_snapshots p
+            JOIN owned_keys o USING (set_code, collector_number, finish)
+            WHERE p.usd IS NOT NULL
+            GROUP BY p.snapshot_date
+            ORDER BY p.snapshot_date;
             """,
             conn,
+            dtype={"total_value_usd": "float64"},
+            dtype_backend="pyarrow",
         )
     finally:
         conn.close()
 
-    merged = owned.merge(
-        snaps,
-        on=["set_code", "collector_number", "finish"],
-        how="inner",
-    )
-    merged["position_value_usd"] = merged["usd"] * merged["qty"]
-
-    ts = (
-        merged.groupby("snapshot_date", as_index=False)
-        .agg(total_value_usd=("position_value_usd", "sum"))
-        .sort_values("snapshot_date")
-        .reset_index(drop=True)
-    )
     return ts
 
 
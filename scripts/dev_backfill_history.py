@@ -3,7 +3,8 @@ from __future__ import annotations
 import sqlite3
 from datetime import date, timedelta
 from pathlib import Path
-import random
+
+import numpy as np
 
 
 def latest_snapshot_date(conn: sqlite3.Connection) -> str:
@@ -39,7 +40,10 @@ def read_snapshot_rows(conn: sqlite3.Connection, snap_date: str) -> list[tuple]:
     return cur.fetchall()
 
 
-def insert_snapshot_rows(conn: sqlite3.Connection, snap_date: str, rows: list[tuple]) -> None:
+def insert_snapshot_rows(conn: sqlite3.Connection, rows: list[tuple]) -> None:
+    """
+    rows are full price_snapshots tuples, snapshot_date first (see read_snapshot_rows for the rest).
+    """
     conn.executemany(
         """
         INSERT OR REPLACE INTO price_snapshots (
@@ -50,42 +54,34 @@ def insert_snapshot_rows(conn: sqlite3.Connection, snap_date: str, rows: list[tu
         )
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
         """,
-        [(snap_date, *r) for r in rows],
+        rows,
     )
 
 
-def apply_random_walk(rows: list[tuple], rng: random.Random, daily_vol: float) -> list[tuple]:
+def apply_random_walk(usd: np.ndarray, rng: np.random.Generator, daily_vol: float) -> np.ndarray:
     """
-    rows tuple structure:
-      (scryfall_id, set_code, collector_number, finish, name, rarity, type_line, usd, fetched_at_epoch)
+    One day of moves for every card at once; usd holds one price per snapshot row (NaN = no price).
 
     daily_vol ~ 0.02 means roughly +/-2% typical day move (not strict).
     """
-    new_rows = []
-    for r in rows:
-        usd = r[7]
-        if usd is None:
-            new_rows.append(r)
-            continue
+    # multiplicative move: price *= (1 + noise)
+    noise = rng.normal(0.0, daily_vol, size=usd.shape)
+    new_usd = np.maximum(0.01, usd * (1.0 + noise))
 
-        # multiplicative move: price *= (1 + noise)
-        noise = rng.normalvariate(0.0, daily_vol)
-        new_usd = max(0.01, float(usd) * (1.0 + noise))
-
-        # keep to 2 decimals like market prices
-        new_usd = round(new_usd, 2)
-
-        new_rows.append((*r[:7], new_usd, r[8]))
-    return new_rows
+    # keep to 2 decimals like market prices (NaN stays NaN)
+    return new_usd.round(2)
 
 
 def main(days_back: int = 90, daily_vol: float = 0.02, seed: int = 42) -> None:
     root = Path(__file__).resolve().parents[1]
     db_path = root / "data" / "mtg_prices.sqlite"
 
-    rng = random.Random(seed)
+    rng = np.random.default_rng(seed)
 
     conn = sqlite3.connect(db_path)
+    # dev-only writer: durability doesn't matter, a failed run is simply re-run
+    conn.execute("PRAGMA journal_mode=MEMORY;")
+    conn.execute("PRAGMA synchronous=OFF;")
     try:
         latest = latest_snapshot_date(conn)
         latest_dt = date.fromisoformat(latest)
@@ -95,9 +91,13 @@ def main(days_back: int = 90, daily_vol: float = 0.02, seed: int = 42) -> None:
             raise RuntimeError("Latest snapshot has no rows.")
 
         created = 0
+        all_rows: list[tuple] = []
+
+        # rows tuple structure:
+        #   (scryfall_id, set_code, collector_number, finish, name, rarity, type_line, usd, fetched_at_epoch)
+        current_usd = np.array([np.nan if r[7] is None else float(r[7]) for r in base_rows], dtype=np.float64)
 
         # create snapshots for latest-1 ... latest-days_back
-        current_rows = base_rows
         for i in range(1, days_back + 1):
             d = (latest_dt - timedelta(days=i)).isoformat()
 
@@ -105,10 +105,15 @@ def main(days_back: int = 90, daily_vol: float = 0.02, seed: int = 42) -> None:
                 continue
 
             # evolve prices one day at a time
-            current_rows = apply_random_walk(current_rows, rng, daily_vol=daily_vol)
-            insert_snapshot_rows(conn, d, current_rows)
+            current_usd = apply_random_walk(current_usd, rng, daily_vol=daily_vol)
+            all_rows.extend(
+                (d, *r[:7], None if np.isnan(usd) else float(usd), r[8])
+                for r, usd in zip(base_rows, current_usd)
+            )
             created += 1
 
+        # one executemany + one commit for every backfilled day
+        insert_snapshot_rows(conn, all_rows)
         conn.commit()
         print(f"✅ Backfilled {created} snapshot day(s) (up to {days_back} days back).")
         print(f"DB: {db_path}")
@@ -66,16 +66,10 @@ def main() -> None:
         if snapshot_exists(conn, dst):
             print(f"ℹ️ Snapshot for {dst} already exists. Skipping clone and proceeding to optional override.")
         else:
-            copied = clone_snapshot(conn, latest, dst)
-            conn.commit()
+            with conn:
+                copied = clone_snapshot(conn, latest, dst)
             print(f"✅ Cloned snapshot {latest} -> {dst} ({copied} rows)")
 
-
-        copied = clone_snapshot(conn, latest, dst)
-        conn.commit()
-
-        print(f"✅ Cloned snapshot {latest} -> {dst} ({copied} rows)")
-
         # OPTIONAL: quick interactive override so you can force movers to show something today
         print("\nOptional: simulate a price move.")
         ans = input("Do you want to override 1 price in the baseline snapshot? [y/N]: ").strip().lower()
@@ -86,8 +80,8 @@ def main() -> None:
             finish = input("finish (foil/nonfoil): ").strip().lower()
             new_usd = float(input("new baseline usd price (e.g. 1.23): ").strip())
 
-            apply_override(conn, dst, scryfall_id, finish, new_usd)
-            conn.commit()
+            with conn:
+                apply_override(conn, dst, scryfall_id, finish, new_usd)
             print("✅ Override applied.")
         else:
             print("Skipped overrides.")
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import sys
-import requests
+
+from _shared import SCRYFALL_RATE_LIMIT, SCRYFALL_SESSION
 
 SCRYFALL_SEARCH = "https://api.scryfall.com/cards/search"
 
@@ -13,7 +14,8 @@ def search_printings(query: str, limit: int = 10) -> list[dict]:
         "order": "released",
         "dir": "desc",
     }
-    r = requests.get(SCRYFALL_SEARCH, params=params, timeout=20)
+    with SCRYFALL_RATE_LIMIT:
+        r = SCRYFALL_SESSION.get(SCRYFALL_SEARCH, params=params, timeout=20)
     r.raise_for_status()
     data = r.json()
     return data.get("data", [])[:limit]
@@ -1,16 +1,17 @@
 from __future__ import annotations
 
-import sqlite3
 from pathlib import Path
 
 import pandas as pd
 
+from scripts._shared import ro_connect
+
 
 def main() -> None:
     root = Path(__file__).resolve().parents[1]
     db_path = root / "data" / "mtg_prices.sqlite"
 
-    conn = sqlite3.connect(db_path)
+    conn = ro_connect(db_path)
     try:
         latest = conn.execute("SELECT MAX(snapshot_date) FROM price_snapshots;").fetchone()[0]
         if not latest:
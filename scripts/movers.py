@@ -6,7 +6,7 @@ from pathlib import Path
 
 import pandas as pd
 
-from scripts._shared import load_collection
+from scripts._shared import load_collection, ro_connect
 
 
 def latest_snapshot_date(conn: sqlite3.Connection) -> str:
@@ -39,7 +39,7 @@ def main(days: int = 7, top_n: int = 5, sort_mode: str = "abs") -> None:
 
     df = load_collection(csv_path)
 
-    conn = sqlite3.connect(db_path)
+    conn = ro_connect(db_path)
     try:
         latest = latest_snapshot_date(conn)
         target = (date.fromisoformat(latest) - timedelta(days=days)).isoformat()
@@ -68,14 +68,18 @@ def main(days: int = 7, top_n: int = 5, sort_mode: str = "abs") -> None:
             params=(latest,),
         )
 
-        baseline_rows = pd.read_sql_query(
+        # latest x baseline join on (scryfall_id, finish), done by SQLite on the snapshot indexes
+        joined_rows = pd.read_sql_query(
             """
-            SELECT scryfall_id, finish, usd AS usd_baseline
-            FROM price_snapshots
-            WHERE snapshot_date = ?;
+            SELECT l.set_code, l.collector_number, l.finish, l.scryfall_id,
+                   l.name, l.usd, b.usd AS usd_baseline
+            FROM price_snapshots l
+            JOIN price_snapshots b
+              ON b.snapshot_date = ? AND b.scryfall_id = l.scryfall_id AND b.finish = l.finish
+            WHERE l.snapshot_date = ? AND l.usd IS NOT NULL AND b.usd IS NOT NULL;
             """,
             conn,
-            params=(baseline,),
+            params=(baseline, latest),
         )
 
         latest_owned = owned_keys.merge(
@@ -93,7 +97,7 @@ def main(days: int = 7, top_n: int = 5, sort_mode: str = "abs") -> None:
         if holdings.empty:
             print("(none)")
         else:
-            top_holdings = holdings.sort_values("position_value_usd", ascending=False).head(top_n)
+            top_holdings = holdings.nlargest(top_n, "position_value_usd")
             hold_cols = ["name", "finish", "qty", "usd", "position_value_usd", "set_code", "collector_number"]
             print(top_holdings[hold_cols].to_string(index=False, col_space=14, justify="left"))
 
@@ -103,9 +107,9 @@ def main(days: int = 7, top_n: int = 5, sort_mode: str = "abs") -> None:
         # -------------------------
         # Movers (gainers/losers)
         # -------------------------
-        movers = latest_owned.merge(baseline_rows, on=["scryfall_id", "finish"], how="inner")
-
-        movers = movers.dropna(subset=["usd", "usd_baseline"]).copy()
+        movers = owned_keys.merge(
+            joined_rows, on=["set_code", "collector_number", "finish"], how="inner"
+        )
         movers["delta_usd"] = movers["usd"] - movers["usd_baseline"]
         movers["pct_change"] = (movers["delta_usd"] / movers["usd_baseline"]) * 100.0
 
@@ -116,8 +120,8 @@ def main(days: int = 7, top_n: int = 5, sort_mode: str = "abs") -> None:
         gainers_pool = moved[moved[sort_col] > 0]
         losers_pool = moved[moved[sort_col] < 0]
 
-        gainers = gainers_pool.sort_values(sort_col, ascending=False).head(top_n)
-        losers = losers_pool.sort_values(sort_col, ascending=True).head(top_n)
+        gainers = gainers_pool.nlargest(top_n, sort_col)
+        losers = losers_pool.nsmallest(top_n, sort_col)
 
         print(f"\n=== Movers over last {days} day(s) ===")
         print(f"Latest snapshot:   {latest}")
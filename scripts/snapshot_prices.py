@@ -4,7 +4,7 @@ from _shared import (
     PrintingKey,
     CACHE_TTL_HOURS,
     load_collection,
-    fetch_scryfall_card_cached,
+    fetch_all,
     choose_unit_price_usd,
 )
 
@@ -16,6 +16,16 @@ from typing import Any, Dict, Optional, Tuple
 
 import pandas as pd
 
+BATCH_SIZE = 10_000
+
+_INSERT_SQL = """
+INSERT OR REPLACE INTO price_snapshots (
+    snapshot_date, scryfall_id, set_code, collector_number, finish,
+    name, rarity, type_line, usd, fetched_at_epoch
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+"""
+
 
 def ensure_schema(conn: sqlite3.Connection) -> None:
     conn.execute("""
@@ -31,41 +41,40 @@ def ensure_schema(conn: sqlite3.Connection) -> None:
         usd REAL,
         fetched_at_epoch REAL,
         PRIMARY KEY (snapshot_date, scryfall_id, finish)
-    );
+    ) WITHOUT ROWID;
     """)
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_scryfall_finish ON price_snapshots(scryfall_id, finish);")
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_date ON price_snapshots(snapshot_date);")
+    # Every extra index is another B-tree write per snapshot row; drop the ones no query needs.
+    # Snapshot queries filter on snapshot_date first, so an index led by scryfall_id is never used,
+    # and the primary key already leads with snapshot_date, so a plain date index is redundant.
+    conn.execute("DROP INDEX IF EXISTS idx_snapshots_scryfall_finish;")
+    conn.execute("DROP INDEX IF EXISTS idx_snapshots_date;")
+    # Covering index for per-date (scryfall_id, finish, usd) reads, e.g. the movers baseline
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_snapshots_date_id_finish_usd "
+        "ON price_snapshots(snapshot_date, scryfall_id, finish, usd);"
+    )
     conn.commit()
 
-def upsert_snapshot(
-    conn: sqlite3.Connection,
+def build_snapshot_row(
     snapshot_date: str,
     card: Dict[str, Any],
     set_code: str,
     collector_number: str,
     finish: str,
     usd: Optional[float],
-) -> None:
-    conn.execute(
-        """
-        INSERT OR REPLACE INTO price_snapshots (
-            snapshot_date, scryfall_id, set_code, collector_number, finish,
-            name, rarity, type_line, usd, fetched_at_epoch
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
-        """,
-        (
-            snapshot_date,
-            card.get("id"),
-            set_code,
-            collector_number,
-            finish,
-            card.get("name"),
-            (card.get("rarity") or "unknown"),
-            (card.get("type_line") or ""),
-            usd,
-            card.get("_fetched_at_epoch"),  # from our disk cache payload
-        ),
+) -> Tuple[Any, ...]:
+    # Column order matches _INSERT_SQL
+    return (
+        snapshot_date,
+        card.get("id"),
+        set_code,
+        collector_number,
+        finish,
+        card.get("name"),
+        (card.get("rarity") or "unknown"),
+        (card.get("type_line") or ""),
+        usd,
+        card.get("_fetched_at_epoch"),  # from our disk cache payload
     )
 
 def main() -> None:
@@ -76,35 +85,59 @@ def main() -> None:
 
     df = load_collection(csv_path)
 
-    # Unique printings to fetch once
-    unique = df[["set", "collector_number"]].drop_duplicates()
+    # One row per (printing, finish) held; fetch_all dedups the printings it fetches
+    printings = df[["set", "collector_number", "finish"]].drop_duplicates()
 
     # Open DB
     conn = sqlite3.connect(db_path)
     try:
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("PRAGMA synchronous=NORMAL;")
+        conn.execute("PRAGMA temp_store=MEMORY;")
+        conn.execute("PRAGMA cache_size=-20000;")
         ensure_schema(conn)
 
         snap_date = date.today().isoformat()
 
+        # Printings already written for today are skipped (no fetch, no rewrite) on same-day re-runs
+        existing = set(
+            conn.execute(
+                "SELECT set_code, collector_number, finish FROM price_snapshots WHERE snapshot_date = ?;",
+                (snap_date,),
+            ).fetchall()
+        )
+        todo = [p for p in printings.itertuples(index=False, name=None) if p not in existing]
+
         # Fetch cards + snapshot per *finish present in your collection rows*
         # (If you have both foil and nonfoil versions of same printing in collection.csv, both get saved.)
-        for _, row in df[["set", "collector_number", "finish"]].drop_duplicates().iterrows():
-            key = PrintingKey(row["set"], row["collector_number"])
-            card, _note = fetch_scryfall_card_cached(cache_dir, key, ttl_hours=CACHE_TTL_HOURS)
-            usd, _price_note = choose_unit_price_usd(card, row["finish"])
-
-            upsert_snapshot(
-                conn=conn,
-                snapshot_date=snap_date,
-                card=card,
-                set_code=key.set_code,
-                collector_number=key.collector_number,
-                finish=row["finish"],
-                usd=usd,
+        fetched = fetch_all(
+            cache_dir,
+            (PrintingKey(s, cn) for s, cn, _finish in todo),
+            ttl_hours=CACHE_TTL_HOURS,
+        )
+
+        rows: list[Tuple[Any, ...]] = []
+        for set_code, collector_number, finish in todo:
+            key = PrintingKey(set_code, collector_number)
+            card, _note = fetched[key]
+            usd, _price_note = choose_unit_price_usd(card, finish)
+
+            rows.append(
+                build_snapshot_row(
+                    snapshot_date=snap_date,
+                    card=card,
+                    set_code=key.set_code,
+                    collector_number=key.collector_number,
+                    finish=finish,
+                    usd=usd,
+                )
             )
 
-        conn.commit()
-        print(f"✅ Snapshot saved for {snap_date}")
+        # One transaction for the whole snapshot, written in page-cache-sized batches
+        with conn:
+            for i in range(0, len(rows), BATCH_SIZE):
+                conn.executemany(_INSERT_SQL, rows[i : i + BATCH_SIZE])
+        print(f"✅ Snapshot saved for {snap_date} ({len(rows)} new, {len(printings) - len(todo)} already present)")
         print(f"DB: {db_path}")
     finally:
         conn.close()
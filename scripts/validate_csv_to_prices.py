@@ -1,146 +1,33 @@
 from __future__ import annotations
 
-import json
-import time
-from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict
 
+import numpy as np
 import pandas as pd
-import requests
 
-SCRYFALL_API = "https://api.scryfall.com"
+# Fetching, rate limiting and the card cache (cache_dir/cards.sqlite) are shared with the snapshot and dashboard
+from _shared import CACHE_TTL_HOURS, PrintingKey, fetch_all, load_collection
 
-# Cache freshness (prices change; we want periodic refresh)
-CACHE_TTL_HOURS = 12
 
-
-@dataclass(frozen=True)
-class PrintingKey:
-    set_code: str
-    collector_number: str
-
-
-def load_collection(csv_path: Path) -> pd.DataFrame:
-    if not csv_path.exists():
-        raise FileNotFoundError(f"CSV not found: {csv_path}")
-
-    df = pd.read_csv(csv_path)
-
-    required = ["set", "collector_number", "qty", "finish"]
-    missing = [c for c in required if c not in df.columns]
-    if missing:
-        raise ValueError(f"Missing required columns: {missing}. Found: {list(df.columns)}")
-
-    df["set"] = df["set"].astype(str).str.strip().str.lower()
-    df["collector_number"] = df["collector_number"].astype(str).str.strip()
-    df["finish"] = df["finish"].astype(str).str.strip().str.lower()
-    df["qty"] = pd.to_numeric(df["qty"], errors="raise").astype(int)
-
-    if "acquired_price_usd" in df.columns:
-        df["acquired_price_usd"] = pd.to_numeric(df["acquired_price_usd"], errors="coerce")
-    else:
-        df["acquired_price_usd"] = pd.NA
-
-    bad_finish = df[~df["finish"].isin(["nonfoil", "foil"])]
-    if not bad_finish.empty:
-        raise ValueError(
-            f"Invalid finish values: {bad_finish['finish'].unique().tolist()} "
-            f"(allowed: nonfoil, foil)"
-        )
-
-    return df
-
-
-def _cache_filename(key: PrintingKey) -> str:
-    # Collector numbers can contain slashes/hyphens; normalize safely
-    safe_cn = key.collector_number.replace("/", "_").replace("\\", "_").replace(" ", "")
-    return f"{key.set_code}__{safe_cn}.json"
-
-
-def cache_get(cache_dir: Path, key: PrintingKey, ttl_hours: int) -> Optional[Dict[str, Any]]:
-    path = cache_dir / _cache_filename(key)
-    if not path.exists():
-        return None
-
-    try:
-        data = json.loads(path.read_text(encoding="utf-8"))
-    except Exception:
-        # Corrupted cache; treat as miss
-        return None
-
-    fetched_at = data.get("_fetched_at_epoch")
-    if not isinstance(fetched_at, (int, float)):
-        return None
-
-    age_seconds = time.time() - float(fetched_at)
-    if age_seconds > ttl_hours * 3600:
-        return None
-
-    return data
-
-
-def cache_set(cache_dir: Path, key: PrintingKey, card: Dict[str, Any]) -> None:
-    cache_dir.mkdir(parents=True, exist_ok=True)
-    card = dict(card)  # copy
-    card["_fetched_at_epoch"] = time.time()
-    (cache_dir / _cache_filename(key)).write_text(json.dumps(card), encoding="utf-8")
-
-
-def fetch_scryfall_card(set_code: str, collector_number: str) -> Dict[str, Any]:
-    url = f"{SCRYFALL_API}/cards/{set_code}/{collector_number}"
-    r = requests.get(url, timeout=20)
-    r.raise_for_status()
-    return r.json()
-
-
-def fetch_scryfall_card_cached(cache_dir: Path, key: PrintingKey, ttl_hours: int) -> Tuple[Dict[str, Any], str]:
-    cached = cache_get(cache_dir, key, ttl_hours=ttl_hours)
-    if cached is not None:
-        return cached, "cache_hit"
-
-    card = fetch_scryfall_card(key.set_code, key.collector_number)
-    cache_set(cache_dir, key, card)
-    return card, "cache_miss_fetched"
-
-
-def choose_unit_price_usd(card: Dict[str, Any], finish: str) -> Tuple[Optional[float], str]:
-    prices = card.get("prices") or {}
-
-    def to_float(x: Any) -> Optional[float]:
-        return float(x) if x not in (None, "", "null") else None
-
-    usd = to_float(prices.get("usd"))
-    usd_foil = to_float(prices.get("usd_foil"))
-
-    if finish == "foil":
-        if usd_foil is not None:
-            return usd_foil, "ok"
-        if usd is not None:
-            return usd, "fallback_used:usd"
-        return None, "missing_price_usd"
-    else:
-        if usd is not None:
-            return usd, "ok"
-        if usd_foil is not None:
-            return usd_foil, "fallback_used:usd_foil"
-        return None, "missing_price_usd"
-
-def type_buckets(type_line: str) -> list[str]:
+@lru_cache(maxsize=4096)
+def type_buckets(type_line: str) -> tuple[str, ...]:
     """
     Turn Scryfall type_line into broad buckets.
     Examples:
-      "Enchantment" -> ["Enchantment"]
-      "Artifact Creature — Golem" -> ["Artifact", "Creature"]
-      "Legendary Creature — Human Wizard" -> ["Legendary", "Creature"]
-      "Instant" -> ["Instant"]
+      "Enchantment" -> ("Enchantment",)
+      "Artifact Creature — Golem" -> ("Artifact", "Creature")
+      "Legendary Creature — Human Wizard" -> ("Legendary", "Creature")
+      "Instant" -> ("Instant",)
+    Memoized: type lines repeat heavily across a collection, hence the (hashable) tuple.
     """
     if not type_line:
-        return ["Unknown"]
+        return ("Unknown",)
 
     left = type_line.split("—")[0].strip()  # use left side only
-    parts = [p.strip() for p in left.split() if p.strip()]
-    return parts if parts else ["Unknown"]
+    parts = tuple(p.strip() for p in left.split() if p.strip())
+    return parts if parts else ("Unknown",)
 
 
 def main() -> None:
@@ -149,59 +36,90 @@ def main() -> None:
     cache_dir = root / "data" / "cache" / "scryfall"
 
     df = load_collection(csv_path)
+    # few distinct values, repeated on every row: store as integer codes
+    df["set"] = df["set"].astype("category")  # finish already comes back categorical
 
     unique = df[["set", "collector_number"]].drop_duplicates()
-    card_cache: Dict[PrintingKey, Dict[str, Any]] = {}
-    fetch_notes: Dict[PrintingKey, str] = {}
 
     # Build cache (fetch once per unique printing)
-    for _, row in unique.iterrows():
-        key = PrintingKey(row["set"], row["collector_number"])
-        card, note = fetch_scryfall_card_cached(cache_dir, key, ttl_hours=CACHE_TTL_HOURS)
-        card_cache[key] = card
-        fetch_notes[key] = note
-
-    # Enrich + value
-    names, scry_ids, unit_prices, price_notes, fetch_sources = [], [], [], [], []
-
-    for _, row in df.iterrows():
-        key = PrintingKey(row["set"], row["collector_number"])
-        card = card_cache[key]
-        unit, price_note = choose_unit_price_usd(card, row["finish"])
-
-        names.append(card.get("name"))
-        scry_ids.append(card.get("id"))
-        unit_prices.append(unit)
-        price_notes.append(price_note)
-        fetch_sources.append(fetch_notes.get(key, "unknown"))
-
-    df["name"] = names
-    df["scryfall_id"] = scry_ids
-    df["unit_price_usd"] = unit_prices
-    df["price_note"] = price_notes
-    df["fetch_source"] = fetch_sources
-    df["position_value_usd"] = df["unit_price_usd"] * df["qty"]
-        # ---- Metadata enrichment (rarity/type) ----
-    rarities = []
-    type_lines = []
-    buckets_list = []
-
-    for _, row in df.iterrows():
-        key = PrintingKey(row["set"], row["collector_number"])
-        card = card_cache[key]
-
-        rarity = (card.get("rarity") or "unknown").lower()
-        type_line = card.get("type_line") or ""
-        buckets = type_buckets(type_line)
-
-        rarities.append(rarity)
-        type_lines.append(type_line)
-        buckets_list.append(buckets)
+    fetched = fetch_all(
+        cache_dir,
+        (PrintingKey(s, cn) for s, cn in unique.itertuples(index=False, name=None)),
+        ttl_hours=CACHE_TTL_HOURS,
+    )
+    card_cache: Dict[PrintingKey, Dict[str, Any]] = {k: card for k, (card, _note) in fetched.items()}
+    fetch_notes: Dict[PrintingKey, str] = {k: note for k, (_card, note) in fetched.items()}
+
+    # Per-printing metadata, attached to every collection row with one merge
+    cards_df = pd.DataFrame(
+        [
+            {
+                "set": k.set_code,
+                "collector_number": k.collector_number,
+                "name": c.get("name"),
+                "scryfall_id": c.get("id"),
+                "fetch_source": fetch_notes.get(k, "unknown"),
+                "rarity": (c.get("rarity") or "unknown").lower(),
+                "type_line": c.get("type_line") or "",
+                "usd": (c.get("prices") or {}).get("usd"),
+                "usd_foil": (c.get("prices") or {}).get("usd_foil"),
+            }
+            for k, c in card_cache.items()
+        ],
+        columns=[
+            "set", "collector_number", "name", "scryfall_id",
+            "fetch_source", "rarity", "type_line", "usd", "usd_foil",
+        ],
+    )
+    cards_df["set"] = pd.Categorical(cards_df["set"], categories=df["set"].cat.categories)
+    cards_df["rarity"] = cards_df["rarity"].astype("category")
+    cards_df["fetch_source"] = cards_df["fetch_source"].astype("category")
+    cards_df["usd"] = pd.to_numeric(cards_df["usd"], errors="coerce").astype(np.float64)
+    cards_df["usd_foil"] = pd.to_numeric(cards_df["usd_foil"], errors="coerce").astype(np.float64)
+    df = df.merge(cards_df, on=["set", "collector_number"], how="left", validate="m:1")
+
+    # Long-format (set, collector_number, type_bucket): one row per bucket per printing,
+    # so a card can belong to multiple buckets without exploding a list column later
+    buckets_df = pd.DataFrame(
+        [
+            (set_code, collector_number, bucket)
+            for set_code, collector_number, type_line in cards_df[
+                ["set", "collector_number", "type_line"]
+            ].itertuples(index=False, name=None)
+            for bucket in type_buckets(type_line)
+        ],
+        columns=["set", "collector_number", "type_bucket"],
+    )
 
-    df["rarity"] = rarities
-    df["type_line"] = type_lines
-    df["type_buckets"] = buckets_list
+    # Same rule as choose_unit_price_usd in _shared, over whole columns:
+    # preferred finish's price, else the other one, else missing
+    is_foil = df["finish"].to_numpy() == "foil"
+    usd = df.pop("usd").to_numpy()
+    usd_foil = df.pop("usd_foil").to_numpy()
+    has_usd = ~np.isnan(usd)
+    has_foil = ~np.isnan(usd_foil)
+
+    unit_price = np.where(
+        is_foil,
+        np.where(has_foil, usd_foil, usd),
+        np.where(has_usd, usd, usd_foil),
+    )
+    price_note = np.select(
+        [is_foil & has_foil, is_foil & has_usd, ~is_foil & has_usd, ~is_foil & has_foil],
+        ["ok", "fallback_used:usd", "ok", "fallback_used:usd_foil"],
+        default="missing_price_usd",
+    )
 
+    # attach the valuation columns in one block instead of one insert per column
+    valuation = pd.DataFrame(
+        {
+            "unit_price_usd": unit_price,
+            "price_note": pd.Categorical(price_note),
+            "position_value_usd": unit_price * df["qty"].to_numpy(),
+        },
+        index=df.index,
+    )
+    df = pd.concat([df, valuation], axis=1)
 
     print("\n=== Valuation Preview (with caching) ===")
     cols = [
@@ -231,7 +149,7 @@ def main() -> None:
         # ---- Breakdown: rarity ----
     print("\n=== Breakdown: Rarity (count & value) ===")
     rarity_summary = (
-        df.groupby("rarity", dropna=False)
+        df.groupby("rarity", dropna=False, sort=False, observed=True)
           .agg(count=("qty", "sum"), value_usd=("position_value_usd", "sum"))
           .sort_values("value_usd", ascending=False)
     )
@@ -239,13 +157,12 @@ def main() -> None:
 
     # ---- Breakdown: type buckets ----
     print("\n=== Breakdown: Type Buckets (count & value) ===")
-    # explode: one row per (card, bucket) so a card can belong to multiple buckets
-    exploded = df.copy()
-    exploded["type_bucket"] = exploded["type_buckets"]
-    exploded = exploded.explode("type_bucket")
-
+    bucketed = buckets_df.merge(
+        df[["set", "collector_number", "qty", "position_value_usd"]],
+        on=["set", "collector_number"],
+    )
     type_summary = (
-        exploded.groupby("type_bucket", dropna=False)
+        bucketed.groupby("type_bucket", dropna=False, sort=False, observed=True)
                 .agg(count=("qty", "sum"), value_usd=("position_value_usd", "sum"))
                 .sort_values("value_usd", ascending=False)
     )